@@ -0,0 +1,70 @@
+import argparse
+import os
+import re
+import subprocess
+import sys
+import time
+
+IMPORT_BUDGET_MS = 400
+STARTUP_BUDGET_MS = 1500
+HEAVY_MODULES = ("selenium", "bs4", "requests")
+
+def run_startup(script):
+    env = dict(os.environ)
+    env["BBC_SOUNDS_STARTUP_BENCHMARK"] = "1"
+    env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    cmd = [sys.executable, "-X", "importtime", script]
+    start = time.perf_counter()
+    result = subprocess.run(cmd, env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+                            cwd=os.path.dirname(os.path.abspath(script)))
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    return result, elapsed_ms
+
+def parse_importtime(stderr):
+    # "import time: self [us] | cumulative | imported package"
+    modules = []
+    for line in stderr.splitlines():
+        match = re.match(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)", line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            modules.append((name, int(self_us), int(cumulative_us), len(indent) - 1))
+    return modules
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure how long main.py takes to paint its main menu.")
+    parser.add_argument("--script", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py"))
+    parser.add_argument("--import-budget-ms", type=float, default=IMPORT_BUDGET_MS)
+    parser.add_argument("--startup-budget-ms", type=float, default=STARTUP_BUDGET_MS)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    result, elapsed_ms = run_startup(args.script)
+    if result.returncode != 0:
+        print(result.stderr[-2000:], file=sys.stderr)
+        print(f"main.py exited with status {result.returncode}", file=sys.stderr)
+        return result.returncode
+
+    modules = parse_importtime(result.stderr)
+    import_ms = sum(self_us for _, self_us, _, _ in modules) / 1000
+    top_level = sorted((m for m in modules if m[3] == 0), key=lambda m: m[2], reverse=True)
+    print("Slowest top-level imports:")
+    for name, _, cumulative_us, _ in top_level[:args.top]:
+        print(f"  {cumulative_us / 1000:8.1f} ms  {name}")
+    print(f"Total import time: {import_ms:.1f} ms (budget {args.import_budget_ms:.0f} ms)")
+    print(f"Time to main menu: {elapsed_ms:.1f} ms (budget {args.startup_budget_ms:.0f} ms)")
+
+    failed = False
+    eager = sorted({name.split(".")[0] for name, _, _, _ in modules} & set(HEAVY_MODULES))
+    if eager:
+        print(f"FAIL: imported at startup, should be lazy: {', '.join(eager)}")
+        failed = True
+    if import_ms > args.import_budget_ms:
+        print("FAIL: import time over budget")
+        failed = True
+    if elapsed_ms > args.startup_budget_ms:
+        print("FAIL: startup time over budget")
+        failed = True
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,130 @@
+import os
+import re
+import sqlite3
+import tempfile
+from datetime import datetime
+
+
+def parse_episode_pid(href):
+    # Last path segment only; BBC pids are a type letter, a digit and at least six more characters.
+    match = re.search(r"/([bmpw]\d[0-9a-z]{6,})/?(?:[?#]|$)", href)
+    return match.group(1) if match else None
+
+def parse_episode_details(label_parts):
+    duration_seconds = None
+    broadcast_date = None
+    for part in label_parts:
+        hours = re.search(r"(\d+)\s*(?:hours?|hrs?)\b", part)
+        minutes = re.search(r"(\d+)\s*(?:minutes?|mins?)\b", part)
+        if duration_seconds is None and (hours or minutes):
+            duration_seconds = (int(hours.group(1)) * 3600 if hours else 0) + \
+                               (int(minutes.group(1)) * 60 if minutes else 0)
+        date = re.search(r"(\d{1,2}\s+[A-Za-z]{3,9}\s+\d{4})", part)
+        if broadcast_date is None and date:
+            for fmt in ("%d %B %Y", "%d %b %Y"):
+                try:
+                    broadcast_date = datetime.strptime(date.group(1), fmt).date().isoformat()
+                    break
+                except ValueError:
+                    pass
+    return duration_seconds, broadcast_date
+
+def default_catalog_path():
+    return os.path.join(os.path.expanduser("~"), ".bbc_sounds_downloader", "catalog.sqlite3")
+
+
+class EpisodeCatalog:
+    COLUMNS = ("url", "pid", "show_name", "show_url", "series_name", "episode_name",
+               "duration_seconds", "broadcast_date", "position", "scraped_at")
+    def __init__(self, path):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.connection = sqlite3.connect(path)
+        self.connection.row_factory = sqlite3.Row
+        self.create_schema(self.connection)
+    @staticmethod
+    def create_schema(connection):
+        with connection:
+            connection.executescript("""
+                CREATE TABLE IF NOT EXISTS episodes (
+                    url TEXT PRIMARY KEY,
+                    pid TEXT,
+                    show_name TEXT NOT NULL,
+                    show_url TEXT NOT NULL,
+                    series_name TEXT,
+                    episode_name TEXT,
+                    duration_seconds INTEGER,
+                    broadcast_date TEXT,
+                    position INTEGER,
+                    scraped_at REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS episodes_show ON episodes (show_url, position);
+                CREATE INDEX IF NOT EXISTS episodes_series ON episodes (series_name);
+                CREATE INDEX IF NOT EXISTS episodes_pid ON episodes (pid);
+                CREATE INDEX IF NOT EXISTS episodes_broadcast ON episodes (broadcast_date);
+            """)
+    def add_episodes(self, episodes, show_url=None):
+        # Newer scrapes win; rows are never deleted so the catalog only grows.
+        columns = ", ".join(self.COLUMNS)
+        placeholders = ", ".join(f":{c}" for c in self.COLUMNS)
+        updates = ", ".join(f"{c} = excluded.{c}" for c in self.COLUMNS if c != "url")
+        with self.connection:
+            if show_url:
+                # A full scrape of the show: episodes no longer listed drop to the end of the list.
+                self.connection.execute("UPDATE episodes SET position = NULL WHERE show_url = ?", (show_url,))
+            self.connection.executemany(
+                f"INSERT INTO episodes ({columns}) VALUES ({placeholders}) "
+                f"ON CONFLICT(url) DO UPDATE SET {updates} WHERE excluded.scraped_at >= episodes.scraped_at",
+                [{c: episode.get(c) for c in self.COLUMNS} for episode in episodes]
+            )
+    def has_show(self, show_url):
+        row = self.connection.execute("SELECT 1 FROM episodes WHERE show_url = ? LIMIT 1", (show_url,)).fetchone()
+        return row is not None
+    def episodes(self, show_url=None, text=None):
+        clauses = []
+        params = []
+        if show_url:
+            clauses.append("show_url = ?")
+            params.append(show_url)
+        if text:
+            clauses.append("(show_name LIKE ? ESCAPE '\\' OR series_name LIKE ? ESCAPE '\\' "
+                           "OR episode_name LIKE ? ESCAPE '\\')")
+            escaped = text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            params.extend([f"%{escaped}%"] * 3)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        query = f"SELECT * FROM episodes {where} ORDER BY show_url, position IS NULL, position"
+        return [dict(row) for row in self.connection.execute(query, params)]
+    def export_catalog(self, path):
+        if os.path.exists(path) and self.path != ":memory:" and os.path.samefile(path, self.path):
+            raise ValueError("Cannot export the catalog over its own file.")
+        # Back up next to the destination, then swap it in so a failed export leaves any old file intact.
+        fd, temp_path = tempfile.mkstemp(suffix=".sqlite3", dir=os.path.dirname(os.path.abspath(path)))
+        os.close(fd)
+        try:
+            destination = sqlite3.connect(temp_path)
+            try:
+                self.connection.backup(destination)
+            finally:
+                destination.close()
+            os.replace(temp_path, path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+    def import_catalog(self, path):
+        columns = ", ".join(self.COLUMNS)
+        updates = ", ".join(f"{c} = excluded.{c}" for c in self.COLUMNS if c != "url")
+        before = self.connection.total_changes
+        self.connection.execute("ATTACH DATABASE ? AS imported", (path,))
+        try:
+            with self.connection:
+                self.connection.execute(
+                    f"INSERT INTO episodes ({columns}) SELECT {columns} FROM imported.episodes WHERE true "
+                    f"ON CONFLICT(url) DO UPDATE SET {updates} WHERE excluded.scraped_at > episodes.scraped_at"
+                )
+        finally:
+            self.connection.execute("DETACH DATABASE imported")
+        return self.connection.total_changes - before
+    def close(self):
+        self.connection.close()
@@ -0,0 +1,547 @@
+import argparse
+import hashlib
+import os
+import re
+import shutil
+import signal
+import socket
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+
+STAGING_DIR_NAME = ".bbc_sounds_staging"
+MIN_FREE_SPACE_BYTES = 512 * 1024 * 1024
+SPACE_RETRY_INTERVAL = 30
+STAGING_SWEEP_INTERVAL = 10 * 60
+LEASE_SECONDS = 60
+POLL_INTERVAL = 2
+ESTIMATE_TIMEOUT = 60
+
+# queued -> leased -> completed/failed; paused and cancelled can be set by any client.
+ACTIVE_STATUSES = ("queued", "leased", "paused")
+
+def staging_name(episode_url, job_id):
+    # Per job, not per URL: the same episode queued twice must not share (and rmtree) one directory.
+    return hashlib.md5(f"{job_id}:{episode_url}".encode("utf-8")).hexdigest()
+
+def staging_dir_for(download_location, episode_url, job_id):
+    # Inside the download location so the final rename stays on one filesystem.
+    return os.path.join(download_location, STAGING_DIR_NAME, staging_name(episode_url, job_id))
+
+def is_partial_file(name):
+    return name.endswith((".part", ".ytdl")) or ".part-Frag" in name or ".temp." in name
+
+def has_free_space(path, min_free_bytes, required_bytes=0):
+    while not os.path.exists(path) and os.path.dirname(path) != path:
+        path = os.path.dirname(path)
+    return shutil.disk_usage(path).free - (required_bytes or 0) >= min_free_bytes
+
+def kill_process_group(process):
+    # yt-dlp runs in its own session; killing only the leader would leave children holding its pipes open.
+    if process.poll() is not None:
+        return
+    if hasattr(os, "killpg"):
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+    else:
+        process.kill()
+
+def estimate_download_size(episode_url, download_quality, on_process=None):
+    try:
+        process = subprocess.Popen(
+            ["yt-dlp", "--skip-download", "--print", "%(filesize,filesize_approx)s",
+             "-f", download_quality, episode_url],
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, start_new_session=True
+        )
+    except OSError:
+        return None
+    # Lets the caller kill the estimate when the job is stopped instead of waiting out the timeout.
+    if on_process:
+        on_process(process)
+    try:
+        stdout, _ = process.communicate(timeout=ESTIMATE_TIMEOUT)
+    except subprocess.TimeoutExpired:
+        kill_process_group(process)
+        process.communicate()
+        return None
+    match = re.search(r"^(\d+)", stdout.strip())
+    if not match:
+        return None
+    # The source stream and the extracted mp3 both sit on disk until conversion ends.
+    return int(match.group(1)) * 3
+
+def sweep_staging(download_location, jobs_in_use):
+    staging_root = os.path.join(download_location, STAGING_DIR_NAME)
+    if not os.path.isdir(staging_root):
+        return
+    in_use = {staging_name(episode_url, job_id) for episode_url, job_id in jobs_in_use}
+    for name in os.listdir(staging_root):
+        if name not in in_use:
+            shutil.rmtree(os.path.join(staging_root, name), ignore_errors=True)
+
+def default_node_id(role="worker"):
+    return f"{role}-{socket.gethostname()}-{os.getpid()}"
+
+def default_job_store_path():
+    return os.environ.get("BBC_SOUNDS_JOB_STORE") or \
+        os.path.join(os.path.expanduser("~"), ".bbc_sounds_downloader", "jobs.sqlite3")
+
+def default_job_store_multi_host():
+    return os.environ.get("BBC_SOUNDS_JOB_STORE_MULTI_HOST", "") not in ("", "0")
+
+
+class DownloadTask:
+    def __init__(self, job_id, episode_url, download_location, download_quality, show_name, series_name,
+                 min_free_bytes=0, estimated_size=None):
+        self.job_id = job_id
+        self.episode_url = episode_url
+        self.download_location = download_location
+        self.download_quality = download_quality
+        self.show_name = show_name
+        self.series_name = series_name
+        self.min_free_bytes = min_free_bytes
+        self.estimated_size = estimated_size
+        self.process = None
+        self.estimate_process = None
+        self.progress = 0
+        self.suspended = False
+        self.stopped = False
+        self.cancelled = False
+        self.held = False
+    def run(self, on_progress=None):
+        try:
+
+            target_dir = os.path.join(self.download_location, self.show_name, self.series_name)
+            staging_dir = staging_dir_for(self.download_location, self.episode_url, self.job_id)
+            os.makedirs(target_dir, exist_ok=True)
+            os.makedirs(staging_dir, exist_ok=True)
+
+            if self.estimated_size is None:
+                self.estimated_size = estimate_download_size(self.episode_url, self.download_quality,
+                                                             self.track_estimate)
+                self.estimate_process = None
+            if self.cancelled:
+                shutil.rmtree(staging_dir, ignore_errors=True)
+                return "cancelled", "Download cancelled."
+            elif self.stopped:
+                return "paused", "Download paused."
+            if not has_free_space(staging_dir, self.min_free_bytes, self.estimated_size):
+                self.held = True
+                return "held", "Waiting for disk space."
+
+            cmd = [
+                "yt-dlp", "--newline",
+                "--extract-audio", "--audio-format", "mp3", "--audio-quality", "0",
+                "-o", os.path.join(staging_dir, "%(title)s.%(ext)s"),
+                "-f", self.download_quality, self.episode_url
+            ]
+            # Own process group so pause/cancel also reach yt-dlp's ffmpeg children.
+            self.process = subprocess.Popen(cmd, stdout=subprocess.PIPE,
+                                            stderr=subprocess.STDOUT, text=True,
+                                            start_new_session=True)
+            if self.stopped:
+                self.kill_process()
+            for line in self.process.stdout:
+                match = re.search(r"\[download\]\s+(\d+(?:\.\d+)?)%", line)
+                if match:
+                    self.progress = int(float(match.group(1)))
+                    if on_progress:
+                        on_progress(self.progress)
+            self.process.wait()
+            if self.cancelled:
+                shutil.rmtree(staging_dir, ignore_errors=True)
+                return "cancelled", "Download cancelled."
+            elif self.stopped:
+                return "paused", "Download paused."
+            elif self.process.returncode == 0:
+                self.finalise_download(staging_dir, target_dir)
+                return "completed", "Download completed successfully."
+            else:
+                return "failed", "Download failed."
+        except Exception as e:
+            return "failed", f"Error: {str(e)}"
+    def finalise_download(self, staging_dir, target_dir):
+        for name in os.listdir(staging_dir):
+            if not is_partial_file(name):
+                os.replace(os.path.join(staging_dir, name), os.path.join(target_dir, name))
+        shutil.rmtree(staging_dir, ignore_errors=True)
+    def track_estimate(self, process):
+        # Kept apart from self.process: pausing must stop the estimate, not SIGSTOP it.
+        self.estimate_process = process
+        if self.stopped:
+            kill_process_group(process)
+    def pause(self):
+        # Returns False when yt-dlp has already exited and the download is being finalised.
+        if self.process and self.process.poll() is not None:
+            return False
+        if self.process and hasattr(signal, "SIGSTOP"):
+            try:
+                os.killpg(self.process.pid, signal.SIGSTOP)
+            except ProcessLookupError:
+                return False
+            self.suspended = True
+        else:
+            # Still estimating, or no job control (Windows): stop now, yt-dlp picks the .part file
+            # back up on resume.
+            self.stop()
+        return True
+    def resume(self):
+        if self.suspended:
+            self.suspended = False
+            try:
+                os.killpg(self.process.pid, signal.SIGCONT)
+            except ProcessLookupError:
+                pass
+    def stop(self):
+        self.stopped = True
+        if self.estimate_process:
+            kill_process_group(self.estimate_process)
+        if self.process:
+            self.kill_process()
+    def cancel(self):
+        self.cancelled = True
+        self.stop()
+    def kill_process(self):
+        kill_process_group(self.process)
+
+
+# Shared download queue. Workers lease jobs and must heartbeat before the lease expires;
+# another backend (e.g. Redis) only needs to implement these methods.
+class JobStore(ABC):
+    @abstractmethod
+    def add_job(self, episode_url, show_name, series_name, download_quality, priority):
+        raise NotImplementedError
+    @abstractmethod
+    def list_jobs(self, statuses=ACTIVE_STATUSES):
+        raise NotImplementedError
+    @abstractmethod
+    def lease_job(self, worker_id, lease_seconds=LEASE_SECONDS):
+        raise NotImplementedError
+    @abstractmethod
+    def heartbeat(self, job_id, worker_id, progress=None, lease_seconds=LEASE_SECONDS):
+        raise NotImplementedError
+    @abstractmethod
+    def release_job(self, job_id, worker_id, status=None, available_at=None, estimated_size=None):
+        raise NotImplementedError
+    @abstractmethod
+    def finish_job(self, job_id, worker_id, status, message):
+        raise NotImplementedError
+    @abstractmethod
+    def reclaim_expired(self):
+        raise NotImplementedError
+    @abstractmethod
+    def pause_job(self, job_id):
+        raise NotImplementedError
+    @abstractmethod
+    def resume_job(self, job_id):
+        raise NotImplementedError
+    @abstractmethod
+    def cancel_job(self, job_id):
+        raise NotImplementedError
+    @abstractmethod
+    def set_priority(self, job_id, priority):
+        raise NotImplementedError
+    @abstractmethod
+    def move_job(self, job_id, new_index):
+        raise NotImplementedError
+    def close(self):
+        pass
+
+
+# WAL needs shared memory on one host, so it is only used when every worker runs on the same
+# machine. With multi_host=True the store keeps SQLite's rollback journal, which relies on
+# file locks alone: the file can then sit on a network share, but only one whose locking
+# SQLite can trust (e.g. NFSv4 with working byte-range locks). Shares with broken locking
+# can corrupt the queue; use a networked JobStore backend for those.
+class SQLiteJobStore(JobStore):
+    def __init__(self, path, timeout=30, multi_host=False):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.connection = sqlite3.connect(path, timeout=timeout, isolation_level=None)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute(f"PRAGMA journal_mode={'DELETE' if multi_host else 'WAL'}")
+        self.connection.executescript("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                job_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                episode_url TEXT NOT NULL,
+                show_name TEXT NOT NULL,
+                series_name TEXT NOT NULL,
+                download_quality TEXT NOT NULL,
+                priority INTEGER NOT NULL,
+                sort_order INTEGER NOT NULL,
+                status TEXT NOT NULL,
+                worker_id TEXT,
+                lease_expires REAL,
+                available_at REAL,
+                estimated_size INTEGER,
+                progress INTEGER NOT NULL DEFAULT 0,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                message TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS jobs_queue ON jobs (status, priority, sort_order);
+            CREATE INDEX IF NOT EXISTS jobs_lease ON jobs (lease_expires);
+        """)
+    @contextmanager
+    def transaction(self):
+        # BEGIN IMMEDIATE takes the write lock up front so two workers never lease the same job.
+        self.connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield self.connection
+        except BaseException:
+            self.connection.execute("ROLLBACK")
+            raise
+        self.connection.execute("COMMIT")
+    def add_job(self, episode_url, show_name, series_name, download_quality, priority):
+        now = time.time()
+        with self.transaction() as connection:
+            cursor = connection.execute(
+                "INSERT INTO jobs (episode_url, show_name, series_name, download_quality, priority, "
+                "sort_order, status, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, (SELECT COALESCE(MAX(sort_order), 0) + 1 FROM jobs), 'queued', ?, ?)",
+                (episode_url, show_name, series_name, download_quality, priority, now, now)
+            )
+            return cursor.lastrowid
+    def list_jobs(self, statuses=ACTIVE_STATUSES):
+        placeholders = ", ".join("?" for _ in statuses)
+        rows = self.connection.execute(
+            f"SELECT * FROM jobs WHERE status IN ({placeholders}) ORDER BY priority, sort_order",
+            tuple(statuses)
+        )
+        return [dict(row) for row in rows]
+    def lease_job(self, worker_id, lease_seconds=LEASE_SECONDS):
+        now = time.time()
+        with self.transaction() as connection:
+            # Jobs pinned to a worker (a suspended process it still holds) are only handed back to it.
+            row = connection.execute(
+                "SELECT * FROM jobs WHERE status = 'queued' AND (worker_id IS NULL OR worker_id = ?) "
+                "AND (available_at IS NULL OR available_at <= ?) ORDER BY priority, sort_order LIMIT 1",
+                (worker_id, now)
+            ).fetchone()
+            if row is None:
+                return None
+            connection.execute(
+                "UPDATE jobs SET status = 'leased', worker_id = ?, lease_expires = ?, "
+                "attempts = attempts + 1, updated_at = ? WHERE job_id = ?",
+                (worker_id, now + lease_seconds, now, row["job_id"])
+            )
+        job = dict(row)
+        job.update(status="leased", worker_id=worker_id)
+        return job
+    def heartbeat(self, job_id, worker_id, progress=None, lease_seconds=LEASE_SECONDS):
+        now = time.time()
+        with self.transaction() as connection:
+            cursor = connection.execute(
+                "UPDATE jobs SET lease_expires = ?, progress = COALESCE(?, progress), updated_at = ? "
+                "WHERE job_id = ? AND worker_id = ?",
+                (now + lease_seconds, progress, now, job_id, worker_id)
+            )
+            if cursor.rowcount == 0:
+                return None
+            return connection.execute("SELECT status FROM jobs WHERE job_id = ?", (job_id,)).fetchone()["status"]
+    def release_job(self, job_id, worker_id, status=None, available_at=None, estimated_size=None):
+        # Only a job still leased changes status; a pause or cancel from a client is kept.
+        with self.transaction() as connection:
+            connection.execute(
+                "UPDATE jobs SET status = CASE status WHEN 'leased' THEN COALESCE(?, 'queued') ELSE status END, "
+                "worker_id = NULL, lease_expires = NULL, available_at = ?, "
+                "estimated_size = COALESCE(?, estimated_size), updated_at = ? "
+                "WHERE job_id = ? AND worker_id = ?",
+                (status, available_at, estimated_size, time.time(), job_id, worker_id)
+            )
+    def finish_job(self, job_id, worker_id, status, message):
+        with self.transaction() as connection:
+            connection.execute(
+                "UPDATE jobs SET status = CASE status WHEN 'cancelled' THEN 'cancelled' ELSE ? END, "
+                "progress = CASE ? WHEN 'completed' THEN 100 ELSE progress END, message = ?, "
+                "worker_id = NULL, lease_expires = NULL, updated_at = ? WHERE job_id = ? AND worker_id = ?",
+                (status, status, message, time.time(), job_id, worker_id)
+            )
+    def reclaim_expired(self):
+        now = time.time()
+        with self.transaction() as connection:
+            cursor = connection.execute(
+                "UPDATE jobs SET status = CASE status WHEN 'leased' THEN 'queued' ELSE status END, "
+                "worker_id = NULL, lease_expires = NULL, updated_at = ? "
+                "WHERE worker_id IS NOT NULL AND lease_expires < ?",
+                (now, now)
+            )
+            return cursor.rowcount
+    def update_status(self, job_id, status, from_statuses):
+        placeholders = ", ".join("?" for _ in from_statuses)
+        with self.transaction() as connection:
+            cursor = connection.execute(
+                f"UPDATE jobs SET status = ?, updated_at = ? WHERE job_id = ? AND status IN ({placeholders})",
+                (status, time.time(), job_id) + tuple(from_statuses)
+            )
+            return cursor.rowcount > 0
+    def pause_job(self, job_id):
+        # A leased job keeps its worker_id; the owner notices on its next heartbeat.
+        return self.update_status(job_id, "paused", ("queued", "leased"))
+    def resume_job(self, job_id):
+        return self.update_status(job_id, "queued", ("paused",))
+    def cancel_job(self, job_id):
+        return self.update_status(job_id, "cancelled", ACTIVE_STATUSES)
+    def set_priority(self, job_id, priority):
+        with self.transaction() as connection:
+            connection.execute("UPDATE jobs SET priority = ?, updated_at = ? WHERE job_id = ?",
+                               (priority, time.time(), job_id))
+    def move_job(self, job_id, new_index):
+        placeholders = ", ".join("?" for _ in ACTIVE_STATUSES)
+        with self.transaction() as connection:
+            # Renumber every active job, not just the queued ones, so a paused or leased job
+            # that is later requeued does not share a sort_order with another.
+            active = [dict(row) for row in connection.execute(
+                f"SELECT job_id, priority, status FROM jobs WHERE status IN ({placeholders}) "
+                "ORDER BY priority, sort_order",
+                ACTIVE_STATUSES
+            )]
+            pending = [j for j in active if j["status"] == "queued"]
+            job = next((j for j in pending if j["job_id"] == job_id), None)
+            if job is None:
+                return
+            pending.remove(job)
+            if not pending:
+                return
+            active.remove(job)
+            new_index = max(0, min(new_index, len(pending)))
+            # Take on the priority of the job it was dropped in front of (or behind, at the end).
+            if new_index < len(pending):
+                job["priority"] = pending[new_index]["priority"]
+                active.insert(active.index(pending[new_index]), job)
+            else:
+                job["priority"] = pending[-1]["priority"]
+                active.insert(active.index(pending[-1]) + 1, job)
+            connection.executemany(
+                "UPDATE jobs SET priority = ?, sort_order = ? WHERE job_id = ?",
+                [(j["priority"], order, j["job_id"]) for order, j in enumerate(active, 1)]
+            )
+    def close(self):
+        self.connection.close()
+
+
+class WorkerNode:
+    def __init__(self, job_store, download_location, node_id=None, concurrency=1,
+                 min_free_bytes=MIN_FREE_SPACE_BYTES, poll_interval=POLL_INTERVAL):
+        self.job_store = job_store
+        self.download_location = download_location
+        self.node_id = node_id or default_node_id()
+        self.concurrency = concurrency
+        self.min_free_bytes = min_free_bytes
+        self.poll_interval = poll_interval
+        self.active = {}  # job_id -> (job, task, thread, result)
+        self.last_sweep = 0
+    def run_forever(self):
+        print(f"{self.node_id}: downloading into {self.download_location}")
+        try:
+            while True:
+                self.step()
+                time.sleep(self.poll_interval)
+        finally:
+            self.shutdown()
+    def step(self):
+        try:
+            self.job_store.reclaim_expired()
+            self.collect_finished()
+            self.heartbeat()
+            if time.time() - self.last_sweep > STAGING_SWEEP_INTERVAL:
+                jobs = [(job["episode_url"], job["job_id"]) for job in self.job_store.list_jobs()]
+                sweep_staging(self.download_location, jobs)
+                self.last_sweep = time.time()
+            while len(self.active) < self.concurrency and \
+                    has_free_space(self.download_location, self.min_free_bytes, self.reserved_bytes()):
+                job = self.job_store.lease_job(self.node_id)
+                if job is None:
+                    break
+                self.start_job(job)
+        except sqlite3.OperationalError as e:
+            # Store locked or briefly unreachable (e.g. over NFS); try again on the next poll.
+            print(f"{self.node_id}: job store unavailable: {e}")
+    def reserved_bytes(self):
+        # Space the running downloads will still need; free space alone does not show it yet.
+        return sum(task.estimated_size or 0 for job, task, thread, result in self.active.values())
+    def start_job(self, job):
+        task = DownloadTask(job["job_id"], job["episode_url"], self.download_location, job["download_quality"],
+                            job["show_name"], job["series_name"], self.min_free_bytes + self.reserved_bytes(),
+                            job["estimated_size"])
+        result = []
+        thread = threading.Thread(target=lambda: result.append(task.run()), daemon=True)
+        self.active[job["job_id"]] = (job, task, thread, result)
+        thread.start()
+        print(f"{self.node_id}: started job {job['job_id']} {job['episode_url']}")
+    def heartbeat(self):
+        for job_id, (job, task, thread, result) in self.active.items():
+            status = self.job_store.heartbeat(job_id, self.node_id, task.progress)
+            if status == "cancelled":
+                task.cancel()
+            elif status != "leased":
+                # Paused by a client, or the lease was lost and the job handed to another worker.
+                task.stop()
+    def collect_finished(self):
+        for job_id, (job, task, thread, result) in list(self.active.items()):
+            if thread.is_alive():
+                continue
+            # Reported before it is dropped so a busy store does not lose the result.
+            self.report_result(job_id, task, result)
+            del self.active[job_id]
+    def report_result(self, job_id, task, result):
+        status, message = result[0] if result else ("failed", "Worker thread exited.")
+        if status == "held":
+            self.job_store.release_job(job_id, self.node_id, "queued",
+                                       time.time() + SPACE_RETRY_INTERVAL, task.estimated_size)
+        elif status == "paused":
+            self.job_store.release_job(job_id, self.node_id)
+        else:
+            self.job_store.finish_job(job_id, self.node_id, status, message)
+        print(f"{self.node_id}: job {job_id} {status}: {message}")
+    def shutdown(self):
+        for job_id, (job, task, thread, result) in list(self.active.items()):
+            task.stop()
+            thread.join()
+            # A job that finished during the join is reported, not requeued. If the store is
+            # unavailable the lease expires and another worker reclaims the job.
+            try:
+                self.report_result(job_id, task, result)
+            except sqlite3.OperationalError as e:
+                print(f"{self.node_id}: could not release job {job_id}: {e}")
+        self.active = {}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Shared BBC Sounds download queue.")
+    parser.add_argument("--store", default=default_job_store_path(), help="path to the SQLite job store")
+    parser.add_argument("--multi-host", action="store_true", default=default_job_store_multi_host(),
+                        help="the store is shared by workers on several machines (disables WAL)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    worker_parser = subparsers.add_parser("worker", help="run a headless download worker")
+    worker_parser.add_argument("--download-location", default=os.getcwd())
+    worker_parser.add_argument("--concurrency", type=int, default=1)
+    worker_parser.add_argument("--node-id")
+    subparsers.add_parser("list", help="show queued, running and paused jobs")
+    args = parser.parse_args(argv)
+
+    job_store = SQLiteJobStore(args.store, multi_host=args.multi_host)
+    if args.command == "worker":
+        node = WorkerNode(job_store, args.download_location, args.node_id, args.concurrency)
+        try:
+            node.run_forever()
+        except KeyboardInterrupt:
+            pass
+    else:
+        for job in job_store.list_jobs():
+            owner = f" on {job['worker_id']}" if job["worker_id"] else ""
+            print(f"{job['job_id']:>6}  {job['status']:<7} p{job['priority']}  {job['progress']:>3}%  "
+                  f"{job['episode_url']}{owner}")
+    job_store.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
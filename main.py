@@ -4,22 +4,22 @@ import time
 import hashlib
 import shutil
 import tempfile
-import requests
-import subprocess
-import re
+import sqlite3
 
 from PyQt5.QtGui import QPixmap, QIcon
 from PyQt5.QtWidgets import (
     QApplication, QWidget, QMainWindow, QVBoxLayout, QHBoxLayout, QLineEdit,
     QPushButton, QListWidget, QTextEdit, QSplitter, QLabel, QListWidgetItem,
     QTabWidget, QProgressBar, QComboBox, QFileDialog, QStackedWidget, QFrame,
-    QScrollArea
+    QScrollArea, QAbstractItemView, QCheckBox
 )
-from PyQt5.QtCore import Qt, QThread, pyqtSignal, QObject
-from bs4 import BeautifulSoup
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.options import Options
+from PyQt5.QtCore import Qt, QThread, QTimer, pyqtSignal, QObject
+from downloads import (
+    STAGING_DIR_NAME, MIN_FREE_SPACE_BYTES, SPACE_RETRY_INTERVAL, STAGING_SWEEP_INTERVAL,
+    POLL_INTERVAL, DownloadTask, SQLiteJobStore, has_free_space, sweep_staging,
+    default_node_id, default_job_store_path, default_job_store_multi_host
+)
+from catalog import EpisodeCatalog, default_catalog_path, parse_episode_pid, parse_episode_details
 
 QUALITY_MAPPING = {
     "Low": "worstaudio",
@@ -27,6 +27,15 @@ QUALITY_MAPPING = {
     "High": "bestaudio"
 }
 
+# Seconds the GUI waits for the shared store's lock before deferring to the next poll.
+STORE_BUSY_TIMEOUT = 0.2
+
+PRIORITY_MAPPING = {
+    "Urgent": 0,
+    "Normal": 1,
+    "Low": 2
+}
+
 def resource_path(relative_path):
     try:
         base_path = sys._MEIPASS
@@ -40,6 +49,11 @@ class DescriptionFetcher(QThread):
         super().__init__()
         self.href = href
     def run(self):
+        # selenium, requests and bs4 are imported where they are used so the main menu
+        # does not pay for them at launch.
+        from selenium import webdriver
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.chrome.options import Options
         chrome_options = Options()
         chrome_options.add_argument("--headless")
         driver = webdriver.Chrome(options=chrome_options)
@@ -69,6 +83,8 @@ class CoverImageFetcher(QThread):
         self.href = href
         self.temp_dir = temp_dir
     def run(self):
+        import requests
+        from bs4 import BeautifulSoup
         local_file = ""
         try:
             response = requests.get(self.href)
@@ -100,80 +116,260 @@ class CoverImageFetcher(QThread):
 class DownloadWorker(QThread):
     progressChanged = pyqtSignal(int)
     downloadFinished = pyqtSignal(str, str)
-    def __init__(self, episode_url, download_location, download_quality, show_name, series_name):
+    def __init__(self, job_id, episode_url, download_location, download_quality, show_name, series_name,
+                 min_free_bytes=0, estimated_size=None):
         super().__init__()
         self.episode_url = episode_url
-        self.download_location = download_location
-        self.download_quality = download_quality
-        self.show_name = show_name
-        self.series_name = series_name
+        self.task = DownloadTask(job_id, episode_url, download_location, download_quality, show_name, series_name,
+                                 min_free_bytes, estimated_size)
+        self.status = None
     def run(self):
-        try:
-
-            target_dir = os.path.join(self.download_location, self.show_name, self.series_name)
-            os.makedirs(target_dir, exist_ok=True)
-
-            cmd = [
-                "yt-dlp", "--newline",
-                "--extract-audio", "--audio-format", "mp3", "--audio-quality", "0",
-                "-o", os.path.join(target_dir, "%(title)s.%(ext)s"),
-                "-f", self.download_quality, self.episode_url
-            ]
-            process = subprocess.Popen(cmd, stdout=subprocess.PIPE,
-                                       stderr=subprocess.STDOUT, text=True)
-            for line in process.stdout:
-                match = re.search(r"\[download\]\s+(\d+(?:\.\d+)?)%", line)
-                if match:
-                    percentage = float(match.group(1))
-                    self.progressChanged.emit(int(percentage))
-            process.wait()
-            if process.returncode == 0:
-                self.downloadFinished.emit("Download completed successfully.", self.episode_url)
-            else:
-                self.downloadFinished.emit("Download failed.", self.episode_url)
-        except Exception as e:
-            self.downloadFinished.emit(f"Error: {str(e)}", self.episode_url)
+        self.status, message = self.task.run(self.progressChanged.emit)
+        self.downloadFinished.emit(message, self.episode_url)
+    def pause(self):
+        return self.task.pause()
+    def resume(self):
+        self.task.resume()
+    def stop(self):
+        self.task.stop()
+    def cancel(self):
+        self.task.cancel()
 
 
 class DownloadManager(QObject):
     progressChanged = pyqtSignal(int)
     downloadFinished = pyqtSignal(str, str)
     queueUpdated = pyqtSignal()
-    def __init__(self, download_location, download_quality):
+    jobsProgressed = pyqtSignal()
+    def __init__(self, download_location, download_quality, job_store=None):
         super().__init__()
         self.download_location = download_location
         self.download_quality = download_quality
-        self.queue = [] 
+        # The queue lives in the job store so headless workers (downloads.py worker) can share it;
+        # this manager runs one local download like any other worker. The store is opened in start().
+        self.job_store = job_store
+        self.pending_store_calls = []
+        self.node_id = default_node_id("gui")
+        self.jobs = []
+        self.suspended = {}  # job_id -> worker whose process is stopped with SIGSTOP
+        self.workers = set()
+        self.current_job = None
         self.current_worker = None
-    def addDownload(self, episode_url, show_name, series_name):
-        self.queue.append((episode_url, show_name, series_name))
-        self.queueUpdated.emit()
+        self.current_progress = None
+        self.min_free_bytes = MIN_FREE_SPACE_BYTES
+        self.poll_timer = QTimer(self)
+        self.poll_timer.setInterval(POLL_INTERVAL * 1000)
+        self.poll_timer.timeout.connect(self.poll)
+        self.sweep_timer = QTimer(self)
+        self.sweep_timer.setInterval(STAGING_SWEEP_INTERVAL * 1000)
+        self.sweep_timer.timeout.connect(self.sweepStaging)
+        self.progressChanged.connect(self.onProgressChanged)
+    def start(self):
+        # Called once the main window has painted: opening the store and sweeping stay off the startup path.
+        if self.job_store is None:
+            self.job_store = SQLiteJobStore(default_job_store_path(), timeout=STORE_BUSY_TIMEOUT,
+                                            multi_host=default_job_store_multi_host())
+        self.poll_timer.start()
+        self.sweep_timer.start()
+        self.refreshJobs()
+        self.sweepStaging()
+    def storeCall(self, method, *args):
+        # Another worker may hold the store's lock. Rather than block the GUI, keep the change
+        # and apply it, in order, on a later poll.
+        if not self.pending_store_calls:
+            try:
+                return method(*args)
+            except sqlite3.OperationalError:
+                pass
+        self.pending_store_calls.append((method, args))
+        return None
+    def flushStoreCalls(self):
+        while self.pending_store_calls:
+            method, args = self.pending_store_calls[0]
+            method(*args)
+            self.pending_store_calls.pop(0)
+    def addDownload(self, episode_url, show_name, series_name, priority=PRIORITY_MAPPING["Normal"]):
+        job_id = self.storeCall(self.job_store.add_job, episode_url, show_name, series_name,
+                                self.download_quality, priority)
+        self.refreshJobs()
         if not self.current_worker:
             self.startNextDownload()
+        return job_id
+    def refreshJobs(self):
+        try:
+            jobs = self.job_store.list_jobs()
+        except sqlite3.OperationalError:
+            return
+        changed = [self.jobKey(job) for job in jobs] != [self.jobKey(job) for job in self.jobs]
+        self.jobs = jobs
+        if changed:
+            self.queueUpdated.emit()
+        else:
+            self.jobsProgressed.emit()
+    def jobKey(self, job):
+        return job["job_id"], job["status"], job["priority"], job["sort_order"], job["worker_id"]
+    def runningDownloads(self):
+        return [job for job in self.jobs if job["status"] == "leased"]
+    def pendingDownloads(self):
+        return [job for job in self.jobs if job["status"] == "queued"]
+    def pausedDownloads(self):
+        return [job for job in self.jobs if job["status"] == "paused"]
+    def isLocal(self, job):
+        return job["worker_id"] == self.node_id
+    def poll(self):
+        try:
+            self.flushStoreCalls()
+            self.job_store.reclaim_expired()
+            self.heartbeat()
+        except sqlite3.OperationalError:
+            # Store busy; try again on the next tick.
+            return
+        self.refreshJobs()
+        if not self.current_worker:
+            self.startNextDownload()
+    def heartbeat(self):
+        if self.current_job:
+            status = self.job_store.heartbeat(self.current_job["job_id"], self.node_id, self.current_progress)
+            if status == "cancelled":
+                self.cancelDownload(self.current_job["job_id"])
+            elif status == "paused":
+                self.pauseDownload(self.current_job["job_id"])
+            elif status != "leased":
+                # Lease lost (e.g. the machine slept); another worker may already have the job.
+                self.current_worker.stop()
+                self.current_job = None
+                self.current_worker = None
+        for job_id, worker in list(self.suspended.items()):
+            status = self.job_store.heartbeat(job_id, self.node_id)
+            if status == "cancelled":
+                del self.suspended[job_id]
+                worker.cancel()
+            elif status is None:
+                # Lease reclaimed but the job is still paused: keep the partial download for whoever resumes it.
+                del self.suspended[job_id]
+                worker.stop()
+    def onProgressChanged(self, percentage):
+        self.current_progress = percentage
     def startNextDownload(self):
-        if self.queue:
-            episode_url, show_name, series_name = self.queue.pop(0)
-            self.current_worker = DownloadWorker(episode_url, self.download_location,
-                                                 self.download_quality, show_name, series_name)
+        if not has_free_space(self.download_location, self.min_free_bytes):
+            return
+        if self.pending_store_calls:
+            # Earlier changes (e.g. a cancel) must reach the store before leasing.
+            return
+        try:
+            job = self.job_store.lease_job(self.node_id)
+        except sqlite3.OperationalError:
+            return
+        if job is None:
+            return
+        self.current_progress = None
+        worker = self.suspended.pop(job["job_id"], None)
+        if worker and worker.isRunning():
+            self.current_worker = worker
+            self.current_worker.resume()
+        else:
+            self.current_worker = DownloadWorker(job["job_id"], job["episode_url"], self.download_location,
+                                                 job["download_quality"], job["show_name"], job["series_name"],
+                                                 self.min_free_bytes, job["estimated_size"])
             self.current_worker.progressChanged.connect(self.progressChanged.emit)
             self.current_worker.downloadFinished.connect(self.onDownloadFinished)
+            self.current_worker.finished.connect(self.onWorkerFinished)
+            self.workers.add(self.current_worker)
             self.current_worker.start()
-            self.queueUpdated.emit()
+        self.current_job = job
+        self.refreshJobs()
     def onDownloadFinished(self, message, episode_url):
-        self.downloadFinished.emit(message, episode_url)
+        worker = self.sender()
+        if worker is not self.current_worker:
+            return
+        job_id = self.current_job["job_id"]
+        if worker.status == "held":
+            self.storeCall(self.job_store.release_job, job_id, self.node_id, "queued",
+                           time.time() + SPACE_RETRY_INTERVAL, worker.task.estimated_size)
+        else:
+            self.storeCall(self.job_store.finish_job, job_id, self.node_id, worker.status, message)
+            self.downloadFinished.emit(message, episode_url)
+        self.current_job = None
         self.current_worker = None
         self.startNextDownload()
+        self.refreshJobs()
+    def onWorkerFinished(self):
+        self.workers.discard(self.sender())
+    def sweepStaging(self):
+        # Read the store afresh: a job leased by a headless worker since the last poll is not in self.jobs.
+        try:
+            jobs = self.job_store.list_jobs()
+        except sqlite3.OperationalError:
+            return
+        jobs = [(job["episode_url"], job["job_id"]) for job in jobs] + \
+               [(worker.episode_url, worker.task.job_id) for worker in self.workers]
+        sweep_staging(self.download_location, jobs)
+    def moveDownload(self, job_id, new_index):
+        self.storeCall(self.job_store.move_job, job_id, new_index)
+        self.refreshJobs()
+    def setPriority(self, job_id, priority):
+        self.storeCall(self.job_store.set_priority, job_id, priority)
+        self.refreshJobs()
+    def pauseDownload(self, job_id):
+        if self.current_job and self.current_job["job_id"] == job_id:
+            if not self.current_worker.pause():
+                # yt-dlp already exited; let the download finish normally.
+                return
+            self.storeCall(self.job_store.pause_job, job_id)
+            if self.current_worker.task.suspended:
+                # Stays leased to this GUI so only it resumes the stopped process.
+                self.suspended[job_id] = self.current_worker
+            else:
+                self.storeCall(self.job_store.release_job, job_id, self.node_id)
+            self.current_job = None
+            self.current_worker = None
+            self.startNextDownload()
+        else:
+            self.storeCall(self.job_store.pause_job, job_id)
+        self.refreshJobs()
+    def resumeDownload(self, job_id):
+        self.storeCall(self.job_store.resume_job, job_id)
+        if not self.current_worker:
+            self.startNextDownload()
+        self.refreshJobs()
+    def cancelDownload(self, job_id):
+        self.storeCall(self.job_store.cancel_job, job_id)
+        if self.current_job and self.current_job["job_id"] == job_id:
+            self.current_worker.cancel()
+            self.current_job = None
+            self.current_worker = None
+            self.startNextDownload()
+        elif job_id in self.suspended:
+            self.suspended.pop(job_id).cancel()
+        self.refreshJobs()
     def shutdown(self):
-        if self.current_worker and self.current_worker.isRunning():
-            self.current_worker.terminate()
-            self.current_worker.wait()
+        self.poll_timer.stop()
+        for worker in list(self.workers):
+            if worker.isRunning():
+                worker.stop()
+                worker.wait()
+        if self.job_store is None:
+            return
+        # Hand our jobs back to the shared queue for the next worker. If the store stays
+        # locked, the leases simply expire and are reclaimed.
+        try:
+            self.flushStoreCalls()
+            if self.current_job:
+                self.job_store.release_job(self.current_job["job_id"], self.node_id)
+            for job_id in self.suspended:
+                self.job_store.release_job(job_id, self.node_id)
+        except sqlite3.OperationalError:
+            pass
+        self.job_store.close()
 
 class QueueItemWidget(QWidget):
-    def __init__(self, episode_url, is_active=False):
+    def __init__(self, job, download_manager, is_active=False, is_paused=False):
         super().__init__()
-        self.episode_url = episode_url
-        self.init_ui(is_active)
-    def init_ui(self, is_active):
+        self.download_manager = download_manager
+        self.is_active = is_active
+        self.init_ui(is_active, is_paused)
+        self.set_job(job)
+    def init_ui(self, is_active, is_paused):
         self.setStyleSheet("""
             QWidget {
                 background-color: #222222;
@@ -186,14 +382,17 @@ class QueueItemWidget(QWidget):
                 font-weight: bold;
                 color: white;
             }
+            QPushButton {
+                font-size: 14px;
+                padding: 4px 8px;
+            }
         """)
         layout = QHBoxLayout()
         layout.setContentsMargins(10, 10, 10, 10)
-        self.label = QLabel(self.episode_url)
+        self.label = QLabel()
         layout.addWidget(self.label)
         self.progress = QProgressBar()
         self.progress.setRange(0, 100)
-        self.progress.setValue(0)
         self.progress.setVisible(is_active)
         self.progress.setFixedWidth(150)
         self.progress.setStyleSheet("""
@@ -209,7 +408,43 @@ class QueueItemWidget(QWidget):
             }
         """)
         layout.addWidget(self.progress)
+        if is_active:
+            self.pause_button = QPushButton("Pause")
+            self.pause_button.clicked.connect(lambda: self.download_manager.pauseDownload(self.job_id))
+            layout.addWidget(self.pause_button)
+        elif is_paused:
+            self.resume_button = QPushButton("Resume")
+            self.resume_button.clicked.connect(lambda: self.download_manager.resumeDownload(self.job_id))
+            layout.addWidget(self.resume_button)
+        else:
+            self.priority_combo = QComboBox()
+            self.priority_combo.addItems(list(PRIORITY_MAPPING.keys()))
+            self.priority_combo.currentTextChanged.connect(
+                lambda name: self.download_manager.setPriority(self.job_id, PRIORITY_MAPPING[name])
+            )
+            layout.addWidget(self.priority_combo)
+        self.cancel_button = QPushButton("Cancel")
+        self.cancel_button.clicked.connect(lambda: self.download_manager.cancelDownload(self.job_id))
+        layout.addWidget(self.cancel_button)
         self.setLayout(layout)
+    def set_job(self, job):
+        # Rows are rebound to whichever job now sits at their position instead of being rebuilt.
+        self.job = job
+        self.job_id = job["job_id"]
+        self.episode_url = job["episode_url"]
+        label = self.episode_url
+        if self.is_active and not self.download_manager.isLocal(job):
+            label += f" (on {job['worker_id']})"
+        elif job["available_at"] and job["available_at"] > time.time():
+            label += " (waiting for disk space)"
+        self.label.setText(label)
+        self.progress.setValue(job["progress"])
+        if hasattr(self, "priority_combo"):
+            self.priority_combo.blockSignals(True)
+            for name, value in PRIORITY_MAPPING.items():
+                if value == job["priority"]:
+                    self.priority_combo.setCurrentText(name)
+            self.priority_combo.blockSignals(False)
     def setProgress(self, value):
         self.progress.setVisible(True)
         self.progress.setValue(value)
@@ -218,16 +453,25 @@ class QueuePage(QWidget):
     def __init__(self, download_manager):
         super().__init__()
         self.download_manager = download_manager
-        self.active_widget = None
-        self.queue_widgets = []
+        self.active_widgets = {}
         self.init_ui()
         self.download_manager.queueUpdated.connect(self.update_queue)
+        self.download_manager.jobsProgressed.connect(self.update_remote_progress)
         self.download_manager.progressChanged.connect(self.update_active_progress)
     def init_ui(self):
         main_layout = QVBoxLayout(self)
         header = QLabel("Download Queue:")
         header.setStyleSheet("font-size: 16px; font-weight: bold; color: white;")
         main_layout.addWidget(header)
+        self.active_layout = QVBoxLayout()
+        main_layout.addLayout(self.active_layout)
+        main_layout.addWidget(QLabel("Up next (drag to reorder):"))
+        self.queue_list = QListWidget()
+        self.queue_list.setDragDropMode(QAbstractItemView.InternalMove)
+        self.queue_list.setDefaultDropAction(Qt.MoveAction)
+        self.queue_list.model().rowsMoved.connect(self.on_rows_moved)
+        main_layout.addWidget(self.queue_list)
+        main_layout.addWidget(QLabel("Paused:"))
         self.scroll_area = QScrollArea()
         self.scroll_area.setWidgetResizable(True)
         self.scroll_content = QWidget()
@@ -237,34 +481,67 @@ class QueuePage(QWidget):
         main_layout.addWidget(self.scroll_area)
         self.update_queue()
     def update_queue(self):
-        for i in reversed(range(self.scroll_layout.count())):
-            widget = self.scroll_layout.itemAt(i).widget()
+        # Existing rows are updated in place; only rows beyond the old length are created.
+        # Building a styled widget per job on every change froze the GUI with long queues.
+        running = self.download_manager.runningDownloads()
+        active = self.sync_layout(self.active_layout, running, is_active=True)
+        self.active_widgets = {job["job_id"]: widget for job, widget in zip(running, active)}
+        self.sync_layout(self.scroll_layout, self.download_manager.pausedDownloads(), is_paused=True)
+        pending = self.download_manager.pendingDownloads()
+        while self.queue_list.count() > len(pending):
+            self.queue_list.takeItem(self.queue_list.count() - 1)
+        for row, job in enumerate(pending):
+            item = self.queue_list.item(row)
+            if item is None:
+                item = QListWidgetItem()
+                self.queue_list.addItem(item)
+            item.setData(Qt.UserRole, job["job_id"])
+            widget = self.queue_list.itemWidget(item)
             if widget:
-                widget.setParent(None)
-        self.active_widget = None
-        self.queue_widgets = []
-        if self.download_manager.current_worker:
-            self.active_widget = QueueItemWidget(self.download_manager.current_worker.episode_url, is_active=True)
-            self.scroll_layout.addWidget(self.active_widget)
-        for tup in self.download_manager.queue:
-            url = tup[0]
-            widget = QueueItemWidget(url, is_active=False)
-            self.queue_widgets.append(widget)
-            self.scroll_layout.addWidget(widget)
+                widget.set_job(job)
+            else:
+                widget = QueueItemWidget(job, self.download_manager)
+                item.setSizeHint(widget.sizeHint())
+                self.queue_list.setItemWidget(item, widget)
+    def sync_layout(self, layout, jobs, is_active=False, is_paused=False):
+        widgets = [layout.itemAt(i).widget() for i in range(layout.count())]
+        for widget in widgets[len(jobs):]:
+            layout.removeWidget(widget)
+            widget.deleteLater()
+        widgets = widgets[:len(jobs)]
+        for widget, job in zip(widgets, jobs):
+            widget.set_job(job)
+        for job in jobs[len(widgets):]:
+            widget = QueueItemWidget(job, self.download_manager, is_active=is_active, is_paused=is_paused)
+            layout.addWidget(widget)
+            widgets.append(widget)
+        return widgets
+    def on_rows_moved(self, parent, start, end, destination, row):
+        new_index = row if row < start else row - 1
+        job_id = self.queue_list.item(new_index).data(Qt.UserRole)
+        # Rebuilding the list from inside the model's move notification is unsafe; defer it.
+        QTimer.singleShot(0, lambda: self.download_manager.moveDownload(job_id, new_index))
     def update_active_progress(self, percentage):
-        if self.active_widget:
-            self.active_widget.setProgress(percentage)
+        current_job = self.download_manager.current_job
+        if current_job and current_job["job_id"] in self.active_widgets:
+            self.active_widgets[current_job["job_id"]].setProgress(percentage)
+    def update_remote_progress(self):
+        for job in self.download_manager.runningDownloads():
+            if job["job_id"] in self.active_widgets and not self.download_manager.isLocal(job):
+                self.active_widgets[job["job_id"]].setProgress(job["progress"])
 
 
 
 class EpisodesWidget(QWidget):
-    def __init__(self, show_url, show_title, main_window, download_manager):
+    def __init__(self, show_url, show_title, main_window, download_manager, catalog):
         super().__init__()
         self.show_url = show_url
         self.show_title = show_title  
         self.main_window = main_window
         self.download_manager = download_manager
+        self.catalog = catalog
         self.episodes_data = []  
+        self.episode_shows = {}
         self.description_cache = {}
         self.cover_cache = {}
         self.fetcher = None
@@ -280,6 +557,18 @@ class EpisodesWidget(QWidget):
         self.back_button = QPushButton("Back to Search")
         self.back_button.clicked.connect(self.main_window.show_search_page)
         main_layout.addWidget(self.back_button)
+        filter_layout = QHBoxLayout()
+        self.filter_edit = QLineEdit()
+        self.filter_edit.setPlaceholderText("Filter episodes...")
+        self.filter_edit.textChanged.connect(self.filter_episodes)
+        filter_layout.addWidget(self.filter_edit)
+        self.all_shows_checkbox = QCheckBox("All shows")
+        self.all_shows_checkbox.stateChanged.connect(self.filter_episodes)
+        filter_layout.addWidget(self.all_shows_checkbox)
+        self.refresh_button = QPushButton("Refresh Episodes")
+        self.refresh_button.clicked.connect(lambda: self.load_episodes(refresh=True))
+        filter_layout.addWidget(self.refresh_button)
+        main_layout.addLayout(filter_layout)
         splitter = QSplitter(Qt.Horizontal)
         self.episode_list = QListWidget()
         splitter.addWidget(self.episode_list)
@@ -292,7 +581,13 @@ class EpisodesWidget(QWidget):
         self.download_button = QPushButton("Download Episode")
         self.download_button.setEnabled(False)
         self.download_button.clicked.connect(self.download_episode)
-        right_layout.addWidget(self.download_button)
+        download_layout = QHBoxLayout()
+        download_layout.addWidget(self.download_button)
+        self.priority_combo = QComboBox()
+        self.priority_combo.addItems(list(PRIORITY_MAPPING.keys()))
+        self.priority_combo.setCurrentText("Normal")
+        download_layout.addWidget(self.priority_combo)
+        right_layout.addLayout(download_layout)
         self.download_progress = QProgressBar()
         self.download_progress.setRange(0, 100)
         self.download_progress.setValue(0)
@@ -312,14 +607,27 @@ class EpisodesWidget(QWidget):
         main_layout.addWidget(splitter)
         self.setLayout(main_layout)
         self.episode_list.itemClicked.connect(self.display_episode_info)
-    def load_episodes(self):
+    def load_episodes(self, refresh=False):
+        error = None
+        if refresh or not self.catalog.has_show(self.show_url):
+            error = self.scrape_episodes()
+        self.filter_episodes()
+        if error:
+            self.info_text.setPlainText(f"Failed to retrieve episodes: {error}")
+    def scrape_episodes(self):
+        import requests
+        from bs4 import BeautifulSoup
         page = 1
         found_any = True
-        self.episodes_data.clear()
-        self.episode_list.clear()
+        episodes = []
+        scraped_at = time.time()
         while found_any:
             url = f"{self.show_url}?page={page}"
-            response = requests.get(url)
+            try:
+                response = requests.get(url)
+            except requests.RequestException as e:
+                # Keep the catalog as it was rather than storing a partial listing.
+                return str(e)
             if response.status_code != 200:
                 break
             soup = BeautifulSoup(response.text, "html.parser")
@@ -341,11 +649,42 @@ class EpisodesWidget(QWidget):
                         else:
                             series_name = "Unknown Series"
                             episode_name = "Unknown Episode"
-                        self.episodes_data.append((series_name, episode_name, href))
-                        self.episode_list.addItem(f"{series_name} - {episode_name}")
+                        duration_seconds, broadcast_date = parse_episode_details(parts[2:])
+                        episodes.append({
+                            "url": href,
+                            "pid": parse_episode_pid(href),
+                            "show_name": self.show_title,
+                            "show_url": self.show_url,
+                            "series_name": series_name,
+                            "episode_name": episode_name,
+                            "duration_seconds": duration_seconds,
+                            "broadcast_date": broadcast_date,
+                            "position": len(episodes),
+                            "scraped_at": scraped_at,
+                        })
                 page += 1
+        if episodes:
+            self.catalog.add_episodes(episodes, show_url=self.show_url)
+        return None
+    def filter_episodes(self):
+        self.episodes_data.clear()
+        self.episode_list.clear()
+        self.episode_shows.clear()
+        text = self.filter_edit.text().strip()
+        all_shows = self.all_shows_checkbox.isChecked()
+        for episode in self.catalog.episodes(show_url=None if all_shows else self.show_url, text=text):
+            series_name, episode_name, href = episode["series_name"], episode["episode_name"], episode["url"]
+            self.episodes_data.append((series_name, episode_name, href))
+            self.episode_shows[href] = episode["show_name"]
+            if all_shows:
+                self.episode_list.addItem(f"{episode['show_name']}: {series_name} - {episode_name}")
+            else:
+                self.episode_list.addItem(f"{series_name} - {episode_name}")
         if not self.episodes_data:
-            self.episode_list.addItem("Failed to retrieve any episodes.")
+            if text:
+                self.episode_list.addItem("No episodes match the filter.")
+            else:
+                self.episode_list.addItem("Failed to retrieve any episodes.")
     def display_episode_info(self, item):
         index = self.episode_list.row(item)
         if index < len(self.episodes_data):
@@ -430,7 +769,9 @@ class EpisodesWidget(QWidget):
         self.info_text.setHtml(info_html)
     def download_episode(self):
         if self.current_episode_href and self.current_series_name:
-            self.download_manager.addDownload(self.current_episode_href, self.show_title, self.current_series_name)
+            show_name = self.episode_shows.get(self.current_episode_href, self.show_title)
+            self.download_manager.addDownload(self.current_episode_href, show_name, self.current_series_name,
+                                              PRIORITY_MAPPING[self.priority_combo.currentText()])
             self.info_text.append("<br><i>Episode added to download queue.</i>")
     def closeEvent(self, event):
         self._is_active = False
@@ -481,6 +822,8 @@ class SearchWidget(QWidget):
         main_layout.addWidget(splitter)
         self.setLayout(main_layout)
     def perform_search(self):
+        import requests
+        from bs4 import BeautifulSoup
         search_term = self.search_edit.text().strip()
         if not search_term:
             return
@@ -563,6 +906,7 @@ class DownloadsPage(QWidget):
     def update_downloads_list(self):
         self.downloads_list.clear()
         for root, dirs, files in os.walk(self.download_manager.download_location):
+            dirs[:] = [d for d in dirs if d != STAGING_DIR_NAME]
             for f in files:
                 if f.lower().endswith(".mp3"):
                     rel_dir = os.path.relpath(root, self.download_manager.download_location)
@@ -570,10 +914,11 @@ class DownloadsPage(QWidget):
 
 class SettingsPage(QWidget):
     settingsChanged = pyqtSignal(str, str)
-    def __init__(self, current_location, current_quality):
+    def __init__(self, current_location, current_quality, catalog):
         super().__init__()
         self.current_location = current_location
         self.current_quality = current_quality
+        self.catalog = catalog
         self.init_ui()
     def init_ui(self):
         frame = QFrame()
@@ -628,6 +973,17 @@ class SettingsPage(QWidget):
         self.save_button = QPushButton("Save Settings")
         self.save_button.clicked.connect(self.save_settings)
         layout.addWidget(self.save_button)
+        layout.addWidget(QLabel("Episode Catalog:"))
+        catalog_layout = QHBoxLayout()
+        self.export_button = QPushButton("Export Catalog")
+        self.export_button.clicked.connect(self.export_catalog)
+        catalog_layout.addWidget(self.export_button)
+        self.import_button = QPushButton("Import Catalog")
+        self.import_button.clicked.connect(self.import_catalog)
+        catalog_layout.addWidget(self.import_button)
+        layout.addLayout(catalog_layout)
+        self.catalog_status = QLabel("")
+        layout.addWidget(self.catalog_status)
         frame.setLayout(layout)
         main_layout = QVBoxLayout()
         main_layout.addWidget(frame)
@@ -640,9 +996,30 @@ class SettingsPage(QWidget):
         self.current_location = self.location_edit.text().strip()
         self.current_quality = self.quality_combo.currentText()
         self.settingsChanged.emit(self.current_location, QUALITY_MAPPING[self.current_quality])
+    def export_catalog(self):
+        path, _ = QFileDialog.getSaveFileName(self, "Export Episode Catalog", "catalog.sqlite3",
+                                              "SQLite Database (*.sqlite3 *.db)")
+        if not path:
+            return
+        try:
+            self.catalog.export_catalog(path)
+            self.catalog_status.setText(f"Catalog exported to {path}")
+        except Exception as e:
+            self.catalog_status.setText(f"Error exporting catalog: {e}")
+    def import_catalog(self):
+        path, _ = QFileDialog.getOpenFileName(self, "Import Episode Catalog", "",
+                                              "SQLite Database (*.sqlite3 *.db)")
+        if not path:
+            return
+        try:
+            count = self.catalog.import_catalog(path)
+            self.catalog_status.setText(f"Imported {count} episodes.")
+        except Exception as e:
+            self.catalog_status.setText(f"Error importing catalog: {e}")
 
 class MainMenuScreen(QWidget):
     startClicked = pyqtSignal()
+    painted = pyqtSignal()
     def __init__(self):
         super().__init__()
         self.init_ui()
@@ -650,9 +1027,8 @@ class MainMenuScreen(QWidget):
         layout = QVBoxLayout()
         layout.setAlignment(Qt.AlignCenter)
         self.logo_label = QLabel()
-        pixmap = QPixmap(resource_path("logo.png"))
-        scaled_pixmap = pixmap.scaledToWidth(600, Qt.SmoothTransformation)
-        self.logo_label.setPixmap(scaled_pixmap)
+        # logo_600.png is logo.png pre-scaled to the 600px display width, so nothing is scaled at launch.
+        self.logo_label.setPixmap(QPixmap(resource_path("logo_600.png")))
         self.logo_label.setAlignment(Qt.AlignCenter)
         layout.addWidget(self.logo_label)
         layout.addSpacing(50)
@@ -662,11 +1038,15 @@ class MainMenuScreen(QWidget):
         self.start_button.clicked.connect(self.startClicked.emit)
         layout.addWidget(self.start_button, alignment=Qt.AlignCenter)
         self.setLayout(layout)
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        self.painted.emit()
 
 class SearchContainer(QWidget):
-    def __init__(self, download_manager, main_window):
+    def __init__(self, download_manager, catalog, main_window):
         super().__init__()
         self.download_manager = download_manager
+        self.catalog = catalog
         self.main_window = main_window
         self.stack = QStackedWidget()
         layout = QVBoxLayout()
@@ -677,7 +1057,8 @@ class SearchContainer(QWidget):
         self.stack.addWidget(self.search_widget)
     def show_episodes(self, show_url, show_title, show_description):
         # Pass show_title to EpisodesWidget
-        self.episodes_widget = EpisodesWidget(show_url, show_title, self.main_window, self.download_manager)
+        self.episodes_widget = EpisodesWidget(show_url, show_title, self.main_window, self.download_manager,
+                                             self.catalog)
         self.stack.addWidget(self.episodes_widget)
         self.stack.setCurrentWidget(self.episodes_widget)
     def showSearch(self):
@@ -685,6 +1066,19 @@ class SearchContainer(QWidget):
         if hasattr(self, 'episodes_widget'):
             self.episodes_widget.deleteLater()
 
+class LazyTab(QWidget):
+    def __init__(self, factory):
+        super().__init__()
+        self.factory = factory
+        self.page = None
+        self.page_layout = QVBoxLayout(self)
+        self.page_layout.setContentsMargins(0, 0, 0, 0)
+    def showEvent(self, event):
+        if self.page is None:
+            self.page = self.factory()
+            self.page_layout.addWidget(self.page)
+        super().showEvent(event)
+
 class MainWindow(QMainWindow):
     def __init__(self):
         super().__init__()
@@ -694,23 +1088,37 @@ class MainWindow(QMainWindow):
         self.download_location = os.getcwd()
         self.download_quality = QUALITY_MAPPING["Medium"]
         self.download_manager = DownloadManager(self.download_location, self.download_quality)
+        self.catalog = None
+        self.tab_widget = None
         self.stacked_widget = QStackedWidget()
         self.setCentralWidget(self.stacked_widget)
         self.main_menu = MainMenuScreen()
         self.main_menu.startClicked.connect(self.show_main_app)
         self.stacked_widget.addWidget(self.main_menu)
+    def build_main_app(self):
+        # Only the main menu is built at launch; tabs are built on Start and the
+        # pages behind them the first time they are shown.
+        self.catalog = EpisodeCatalog(default_catalog_path())
         self.tab_widget = QTabWidget()
-        self.search_container = SearchContainer(self.download_manager, self)
+        self.search_container = SearchContainer(self.download_manager, self.catalog, self)
         self.tab_widget.addTab(self.search_container, "Search")
+        self.tab_widget.addTab(LazyTab(self.create_downloads_page), "Downloads")
+        self.tab_widget.addTab(LazyTab(self.create_queue_page), "Queue")
+        self.tab_widget.addTab(LazyTab(self.create_settings_page), "Settings")
+        self.stacked_widget.addWidget(self.tab_widget)
+    def create_downloads_page(self):
         self.downloads_page = DownloadsPage(self.download_manager)
-        self.tab_widget.addTab(self.downloads_page, "Downloads")
+        return self.downloads_page
+    def create_queue_page(self):
         self.queue_page = QueuePage(self.download_manager)
-        self.tab_widget.addTab(self.queue_page, "Queue")
-        self.settings_page = SettingsPage(self.download_location, "Medium")
+        return self.queue_page
+    def create_settings_page(self):
+        self.settings_page = SettingsPage(self.download_location, "Medium", self.catalog)
         self.settings_page.settingsChanged.connect(self.update_settings)
-        self.tab_widget.addTab(self.settings_page, "Settings")
-        self.stacked_widget.addWidget(self.tab_widget)
+        return self.settings_page
     def show_main_app(self):
+        if self.tab_widget is None:
+            self.build_main_app()
         self.stacked_widget.setCurrentWidget(self.tab_widget)
     def update_settings(self, location, quality):
         self.download_location = location
@@ -721,6 +1129,8 @@ class MainWindow(QMainWindow):
         self.search_container.showSearch()
     def closeEvent(self, event):
         self.download_manager.shutdown()
+        if self.catalog:
+            self.catalog.close()
         event.accept()
 
 if __name__ == "__main__":
@@ -752,4 +1162,10 @@ if __name__ == "__main__":
     app.setStyleSheet(style)
     window = MainWindow()
     window.show()
+    if os.environ.get("BBC_SOUNDS_STARTUP_BENCHMARK"):
+        # Used by benchmark_startup.py: quit once the main menu has been painted, without
+        # opening the user's job store or sweeping the download location.
+        window.main_menu.painted.connect(app.quit)
+    else:
+        QTimer.singleShot(0, window.download_manager.start)
     sys.exit(app.exec_())
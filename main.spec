@@ -5,7 +5,7 @@ a = Analysis(
     ['main.py'],
     pathex=[],
     binaries=[],
-    datas=[('app_icon.png', '.'), ('logo.png', '.')],
+    datas=[('app_icon.png', '.'), ('logo_600.png', '.')],
     hiddenimports=[],
     hookspath=[],
     hooksconfig={},
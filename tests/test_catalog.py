@@ -0,0 +1,93 @@
+import pytest
+
+from catalog import EpisodeCatalog, parse_episode_details, parse_episode_pid
+
+SHOW = "https://www.bbc.co.uk/sounds/brand/b006qykl"
+
+
+@pytest.fixture
+def catalog():
+    episode_catalog = EpisodeCatalog(":memory:")
+    yield episode_catalog
+    episode_catalog.close()
+
+
+def episode(name, scraped_at=1.0, position=0, show_url=SHOW, **fields):
+    row = {"url": f"https://www.bbc.co.uk/sounds/play/{name}", "pid": name, "show_name": "Show",
+           "show_url": show_url, "series_name": "Series", "episode_name": name,
+           "position": position, "scraped_at": scraped_at}
+    row.update(fields)
+    return row
+
+
+def names(episodes):
+    return [row["episode_name"] for row in episodes]
+
+
+@pytest.mark.parametrize("href, pid", [
+    ("https://www.bbc.co.uk/sounds/play/m001abcd", "m001abcd"),
+    ("/sounds/play/m001abcd/?autoplay=1", "m001abcd"),
+    ("https://www.bbc.co.uk/programmes/p0abcdef", "p0abcdef"),
+    ("https://www.bbc.co.uk/programmes", None),
+    ("/sounds/brand/b006qykl/episodes", None),
+])
+def test_parse_episode_pid(href, pid):
+    assert parse_episode_pid(href) == pid
+
+
+def test_parse_episode_details():
+    assert parse_episode_details(["1 hour 5 mins", "3 March 2024"]) == (3900, "2024-03-03")
+    assert parse_episode_details(["Available for 29 days"]) == (None, None)
+
+
+def test_text_filter_escapes_like_wildcards(catalog):
+    catalog.add_episodes([episode("100% pure"), episode("a_b"), episode("plain"), episode("axb")])
+    assert names(catalog.episodes(text="%")) == ["100% pure"]
+    assert names(catalog.episodes(text="a_b")) == ["a_b"]
+
+
+def test_newer_scrape_wins(catalog):
+    catalog.add_episodes([episode("e1", scraped_at=2.0, series_name="New")])
+    catalog.add_episodes([episode("e1", scraped_at=1.0, series_name="Old")])
+    assert catalog.episodes()[0]["series_name"] == "New"
+    catalog.add_episodes([episode("e1", scraped_at=3.0, series_name="Newest")])
+    assert catalog.episodes()[0]["series_name"] == "Newest"
+
+
+def test_full_show_refresh_resets_stale_positions(catalog):
+    other_show = "https://www.bbc.co.uk/sounds/brand/other"
+    catalog.add_episodes([episode("e1", position=0), episode("e2", position=1),
+                          episode("x1", position=0, show_url=other_show)], show_url=SHOW)
+    catalog.add_episodes([episode("e3", scraped_at=2.0, position=0),
+                          episode("e2", scraped_at=2.0, position=1)], show_url=SHOW)
+    rows = catalog.episodes(show_url=SHOW)
+    assert names(rows) == ["e3", "e2", "e1"]
+    assert rows[2]["position"] is None
+    assert catalog.episodes(show_url=other_show)[0]["position"] == 0
+
+
+def test_export_refuses_its_own_file(tmp_path):
+    path = str(tmp_path / "catalog.sqlite3")
+    episode_catalog = EpisodeCatalog(path)
+    episode_catalog.add_episodes([episode("e1")])
+    with pytest.raises(ValueError):
+        episode_catalog.export_catalog(path)
+    assert names(episode_catalog.episodes()) == ["e1"]
+    episode_catalog.close()
+
+
+def test_import_merges_and_counts_changes(catalog, tmp_path):
+    exported = EpisodeCatalog(str(tmp_path / "source.sqlite3"))
+    exported.add_episodes([episode("e1", scraped_at=5.0, series_name="Imported"),
+                           episode("e2", scraped_at=1.0, series_name="Imported"),
+                           episode("e3", scraped_at=1.0)])
+    export_path = str(tmp_path / "export.sqlite3")
+    exported.export_catalog(export_path)
+    exported.close()
+    catalog.add_episodes([episode("e1", scraped_at=2.0, series_name="Local"),
+                          episode("e2", scraped_at=2.0, series_name="Local")])
+    # e1 is newer in the import, e2 is older and kept, e3 is new.
+    assert catalog.import_catalog(export_path) == 2
+    series = {row["episode_name"]: row["series_name"] for row in catalog.episodes()}
+    assert series == {"e1": "Imported", "e2": "Local", "e3": "Series"}
+    assert catalog.import_catalog(export_path) == 0
@@ -0,0 +1,266 @@
+import os
+import shutil
+import stat
+import sys
+import threading
+import time
+
+import pytest
+
+from downloads import (
+    STAGING_DIR_NAME, DownloadTask, SQLiteJobStore, WorkerNode, has_free_space, is_partial_file,
+    staging_dir_for, sweep_staging
+)
+
+
+@pytest.fixture
+def store():
+    job_store = SQLiteJobStore(":memory:")
+    yield job_store
+    job_store.close()
+
+
+def add(store, name, priority=2):
+    return store.add_job(f"https://www.bbc.co.uk/sounds/play/{name}", "Show", "Series", "high", priority)
+
+
+def status_of(store, job_id):
+    jobs = store.list_jobs(("queued", "leased", "paused", "cancelled", "completed", "failed"))
+    return next(job["status"] for job in jobs if job["job_id"] == job_id)
+
+
+def test_lease_order_is_priority_then_queue_position(store):
+    first = add(store, "a")
+    urgent = add(store, "b", priority=0)
+    second = add(store, "c")
+    leased = [store.lease_job("w1")["job_id"] for _ in range(3)]
+    assert leased == [urgent, first, second]
+    assert store.lease_job("w1") is None
+
+
+def test_lease_skips_jobs_not_yet_available(store):
+    job_id = add(store, "a")
+    store.lease_job("w1")
+    store.release_job(job_id, "w1", "queued", time.time() + 60)
+    assert store.lease_job("w2") is None
+
+
+def test_pinned_job_is_only_leased_by_its_worker(store):
+    job_id = add(store, "a")
+    store.lease_job("gui")
+    # Paused while leased and then resumed: the job stays with the worker holding its process.
+    store.pause_job(job_id)
+    store.resume_job(job_id)
+    assert store.lease_job("other") is None
+    assert store.lease_job("gui")["job_id"] == job_id
+
+
+def test_expired_lease_is_reclaimed(store):
+    job_id = add(store, "a")
+    store.lease_job("w1", lease_seconds=0.01)
+    time.sleep(0.05)
+    assert store.reclaim_expired() == 1
+    assert store.heartbeat(job_id, "w1") is None
+    assert store.lease_job("w2")["job_id"] == job_id
+
+
+def test_heartbeat_keeps_lease_alive(store):
+    job_id = add(store, "a")
+    store.lease_job("w1", lease_seconds=0.05)
+    assert store.heartbeat(job_id, "w1", progress=40) == "leased"
+    time.sleep(0.06)
+    # The heartbeat renewed the lease for the default LEASE_SECONDS.
+    assert store.reclaim_expired() == 0
+    assert store.list_jobs()[0]["progress"] == 40
+
+
+@pytest.mark.parametrize("action, expected", [("pause_job", "paused"), ("cancel_job", "cancelled")])
+def test_client_change_while_leased_reaches_worker(store, action, expected):
+    job_id = add(store, "a")
+    store.lease_job("w1")
+    assert getattr(store, action)(job_id)
+    assert store.heartbeat(job_id, "w1") == expected
+
+
+@pytest.mark.parametrize("action, expected", [("pause_job", "paused"), ("cancel_job", "cancelled")])
+def test_held_release_keeps_client_change(store, action, expected):
+    job_id = add(store, "a")
+    store.lease_job("w1")
+    getattr(store, action)(job_id)
+    store.release_job(job_id, "w1", "queued", time.time() + 30)
+    assert status_of(store, job_id) == expected
+    assert store.lease_job("w1") is None
+
+
+def test_held_release_requeues_with_retry_time(store):
+    job_id = add(store, "a")
+    store.lease_job("w1")
+    retry_at = time.time() + 30
+    store.release_job(job_id, "w1", "queued", retry_at, estimated_size=1000)
+    job = store.list_jobs()[0]
+    assert (job["status"], job["worker_id"], job["available_at"], job["estimated_size"]) == \
+        ("queued", None, retry_at, 1000)
+
+
+def test_finish_keeps_cancel(store):
+    job_id = add(store, "a")
+    store.lease_job("w1")
+    store.cancel_job(job_id)
+    store.finish_job(job_id, "w1", "completed", "done")
+    assert status_of(store, job_id) == "cancelled"
+
+
+def test_move_job_takes_priority_of_neighbour(store):
+    high = add(store, "a", priority=1)
+    normal = add(store, "b", priority=2)
+    low = add(store, "c", priority=3)
+    store.move_job(low, 0)
+    jobs = store.list_jobs()
+    assert [job["job_id"] for job in jobs] == [low, high, normal]
+    assert jobs[0]["priority"] == 1
+    store.move_job(low, 2)
+    jobs = store.list_jobs()
+    assert [job["job_id"] for job in jobs] == [high, normal, low]
+    assert jobs[2]["priority"] == 2
+
+
+def test_move_job_keeps_other_active_jobs_in_place(store):
+    paused = add(store, "a")
+    first = add(store, "b")
+    second = add(store, "c")
+    store.pause_job(paused)
+    store.move_job(second, 0)
+    store.resume_job(paused)
+    jobs = store.list_jobs()
+    assert [job["job_id"] for job in jobs] == [paused, second, first]
+    assert len({job["sort_order"] for job in jobs}) == 3
+
+
+def test_worker_step_survives_locked_store(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+    locked_store = SQLiteJobStore(path, timeout=0.01)
+    other = SQLiteJobStore(path)
+    other.connection.execute("BEGIN IMMEDIATE")
+    node = WorkerNode(locked_store, str(tmp_path / "downloads"), "w1")
+    node.step()
+    node.shutdown()
+    other.connection.execute("ROLLBACK")
+    other.close()
+    locked_store.close()
+
+
+# A stand-in yt-dlp: the size estimate prints a size (or sleeps), a download writes one mp3.
+FAKE_YT_DLP = """#!/bin/sh
+case "$*" in
+    *--skip-download*) [ -n "$FAKE_ESTIMATE_SLEEP" ] && sleep "$FAKE_ESTIMATE_SLEEP"; echo 1000 ;;
+    *) out=$(echo "$*" | sed 's/.*-o \\([^ ]*\\)%(title)s.*/\\1/'); echo episode > "${out}Episode.mp3" ;;
+esac
+"""
+
+
+@pytest.fixture
+def fake_yt_dlp(tmp_path, monkeypatch):
+    if sys.platform == "win32":
+        pytest.skip("needs a POSIX shell")
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    script = bin_dir / "yt-dlp"
+    script.write_text(FAKE_YT_DLP)
+    script.chmod(script.stat().st_mode | stat.S_IEXEC)
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    return script
+
+
+def make_task(tmp_path, job_id=1, **kwargs):
+    return DownloadTask(job_id, "https://www.bbc.co.uk/sounds/play/p0abc123", str(tmp_path / "downloads"),
+                        "best", "Show", "Series", **kwargs)
+
+
+@pytest.mark.parametrize("name, partial", [
+    ("Episode.mp3", False),
+    ("Episode.m4a.part", True),
+    ("Episode.m4a.ytdl", True),
+    ("Episode.m4a.part-Frag3", True),
+    ("Episode.temp.mp3", True),
+])
+def test_is_partial_file(name, partial):
+    assert is_partial_file(name) == partial
+
+
+def test_has_free_space_walks_up_to_an_existing_directory(tmp_path):
+    free = shutil.disk_usage(tmp_path).free
+    missing = tmp_path / "not" / "created" / "yet"
+    assert has_free_space(str(missing), 0)
+    assert not has_free_space(str(missing), 0, required_bytes=free * 2)
+    assert not has_free_space(str(tmp_path), free * 2)
+
+
+def test_sweep_staging_removes_only_unused_directories(tmp_path):
+    location = str(tmp_path)
+    in_use = staging_dir_for(location, "https://example.com/a", 1)
+    duplicate = staging_dir_for(location, "https://example.com/a", 2)
+    stale = os.path.join(location, STAGING_DIR_NAME, "leftover")
+    for path in (in_use, duplicate, stale):
+        os.makedirs(path)
+    sweep_staging(location, [("https://example.com/a", 1)])
+    assert os.path.isdir(in_use)
+    assert not os.path.exists(duplicate)
+    assert not os.path.exists(stale)
+
+
+def test_sweep_staging_without_staging_root(tmp_path):
+    sweep_staging(str(tmp_path), [])
+    assert os.listdir(tmp_path) == []
+
+
+def test_finalise_download_moves_finished_files_only(tmp_path):
+    staging = tmp_path / "staging"
+    target = tmp_path / "target"
+    staging.mkdir()
+    target.mkdir()
+    (staging / "Episode.mp3").write_text("audio")
+    (staging / "Episode.m4a.part").write_text("partial")
+    make_task(tmp_path).finalise_download(str(staging), str(target))
+    assert os.listdir(target) == ["Episode.mp3"]
+    assert not staging.exists()
+
+
+def test_run_is_held_without_disk_space(tmp_path):
+    task = make_task(tmp_path, min_free_bytes=shutil.disk_usage(tmp_path).free * 2, estimated_size=1000)
+    assert task.run()[0] == "held"
+    assert task.held
+
+
+def test_run_completes_into_the_series_folder(tmp_path, fake_yt_dlp):
+    task = make_task(tmp_path)
+    assert task.run() == ("completed", "Download completed successfully.")
+    assert task.estimated_size == 3000
+    assert os.listdir(tmp_path / "downloads" / "Show" / "Series") == ["Episode.mp3"]
+    assert os.listdir(tmp_path / "downloads" / STAGING_DIR_NAME) == []
+
+
+@pytest.mark.parametrize("action, expected", [("cancel", "cancelled"), ("pause", "paused")])
+def test_run_stopped_during_size_estimate(tmp_path, fake_yt_dlp, monkeypatch, action, expected):
+    monkeypatch.setenv("FAKE_ESTIMATE_SLEEP", "30")
+    task = make_task(tmp_path)
+    result = []
+    thread = threading.Thread(target=lambda: result.append(task.run()))
+    thread.start()
+    deadline = time.time() + 5
+    while task.estimate_process is None and time.time() < deadline:
+        time.sleep(0.01)
+    started = time.time()
+    getattr(task, action)()
+    thread.join(10)
+    assert time.time() - started < 5
+    assert result[0][0] == expected
+    assert not task.suspended
+    staging = staging_dir_for(task.download_location, task.episode_url, task.job_id)
+    assert os.path.isdir(staging) == (expected == "paused")
+
+
+def test_worker_reserves_space_for_running_downloads(tmp_path):
+    node = WorkerNode(SQLiteJobStore(":memory:"), str(tmp_path), "w1")
+    node.active[1] = (None, make_task(tmp_path, estimated_size=1000), None, [])
+    node.active[2] = (None, make_task(tmp_path, job_id=2), None, [])
+    assert node.reserved_bytes() == 1000